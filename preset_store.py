@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+import os, sys, json, math, hashlib, tempfile, argparse
+
+INDEX_FILE = '.preset_index.json'
+INDEX_VERSION = 1
+BAD_NAME_CHARS = r'\/:*?"<>|'
+IMAGE_EXTS = ('.png', '.bmp', '.jpg', '.jpeg', '.webp')
+
+# All keys are optional (the GUI keeps its current value for missing ones);
+# keys not listed here are kept as-is.
+NUMBER = (int, float)
+PRESET_SCHEMA = {
+    'bat_x': NUMBER, 'bat_y': NUMBER, 'bat_w': NUMBER, 'bat_h': NUMBER,
+    'fill16': NUMBER, 'fill99': NUMBER, 'fillbase': NUMBER,
+    'pct_x': NUMBER, 'pct_y': NUMBER,
+    'wave_fps': NUMBER, 'low_fps': NUMBER,
+    'assets_hash': (str,),
+}
+POSITIVE_KEYS = ('bat_w', 'bat_h', 'wave_fps', 'low_fps')
+
+class PresetError(ValueError):
+    pass
+
+def validate_preset(preset):
+    if not isinstance(preset, dict):
+        raise PresetError("preset must be a JSON object")
+    for key, types in PRESET_SCHEMA.items():
+        if key not in preset:
+            continue
+        v = preset[key]
+        if isinstance(v, bool) or not isinstance(v, types):
+            raise PresetError(f"{key}: expected {'/'.join(t.__name__ for t in types)}, got {type(v).__name__}")
+        if types is NUMBER and not math.isfinite(v):
+            raise PresetError(f"{key}: must be a finite number")
+        if key in POSITIVE_KEYS and v <= 0:
+            raise PresetError(f"{key} must be positive")
+    return preset
+
+def check_name(name):
+    name = (name or '').strip()
+    if not name or name.startswith('.') or any(c in name for c in BAD_NAME_CHARS):
+        raise PresetError(f"invalid preset name: {name!r}")
+    return name
+
+def folder_hash(folder):
+    # Cheap fingerprint of an asset folder: image file names and sizes, no pixel reads.
+    h = hashlib.sha1()
+    for ent in sorted(os.scandir(folder), key=lambda e: e.name):
+        if ent.is_file() and ent.name.lower().endswith(IMAGE_EXTS):
+            h.update(f"{ent.name}:{ent.stat().st_size}\n".encode('utf-8'))
+    return h.hexdigest()[:16]
+
+def atomic_write_json(path, data):
+    d = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=d)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, ensure_ascii=False, indent=2)
+            fh.flush()
+            os.fsync(fh.fileno())
+        # mkstemp creates 0600; keep presets readable by others on a shared folder.
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+class PresetStore:
+    """JSON presets in one directory.
+
+    Plain listing is a single directory read. Filtering by assets_hash goes
+    through a cached index (mtime, size, assets_hash per preset), so only files
+    whose mtime or size changed since last time are re-read. Single saves,
+    deletes and renames leave the index alone; refresh() catches up lazily.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._index = None
+
+    def path(self, name):
+        return os.path.join(self.folder, check_name(name) + '.json')
+
+    def _index_path(self):
+        return os.path.join(self.folder, INDEX_FILE)
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+            if data.get('version') != INDEX_VERSION:
+                raise ValueError
+            presets = data.get('presets', {})
+            # Shared cache other users write to: anything malformed means start over.
+            if not isinstance(presets, dict) or not all(
+                    isinstance(e, dict) and isinstance(e.get('mtime'), int)
+                    and isinstance(e.get('size'), int) and isinstance(e.get('valid'), bool)
+                    for e in presets.values()):
+                raise ValueError
+            self._index = presets
+        except (OSError, ValueError, AttributeError):
+            self._index = {}
+        return self._index
+
+    def _save_index(self):
+        try:
+            atomic_write_json(self._index_path(), {'version': INDEX_VERSION, 'presets': self._index})
+        except OSError as e:
+            # Read-only preset dirs still work, they just lose the cache.
+            print(f"[WARN] cannot write preset index: {e}")
+
+    def _entry(self, st, preset):
+        return {
+            'mtime': st.st_mtime_ns, 'size': st.st_size,
+            'assets_hash': preset.get('assets_hash') if isinstance(preset, dict) else None,
+            'valid': preset is not None,
+        }
+
+    def refresh(self):
+        index = self._load_index()
+        seen = {}
+        changed = False
+        try:
+            entries = list(os.scandir(self.folder))
+        except OSError:
+            entries = []
+        for ent in entries:
+            if not ent.name.lower().endswith('.json') or ent.name.startswith('.'):
+                continue
+            name = os.path.splitext(ent.name)[0]
+            try:
+                st = ent.stat()
+            except OSError:
+                continue
+            old = index.get(name)
+            if old and old['mtime'] == st.st_mtime_ns and old['size'] == st.st_size:
+                seen[name] = old
+                continue
+            try:
+                preset = self._read(ent.path)
+            except (OSError, PresetError):
+                preset = None
+            seen[name] = self._entry(st, preset)
+            changed = True
+        if changed or set(seen) != set(index):
+            self._index = seen
+            self._save_index()
+        return self._index
+
+    def names(self):
+        try:
+            files = os.listdir(self.folder)
+        except OSError:
+            files = []
+        return sorted(os.path.splitext(f)[0] for f in files
+                      if f.lower().endswith('.json') and not f.startswith('.'))
+
+    def list(self, assets_hash=None):
+        # Presets without an assets_hash are kept: they predate the hash or suit any folder.
+        if assets_hash is None:
+            return self.names()
+        return [name for name, ent in sorted(self.refresh().items())
+                if ent['valid'] and ent.get('assets_hash') in (None, assets_hash)]
+
+    def info(self, name):
+        return self.refresh().get(name)
+
+    def _read(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                preset = json.load(fh)
+        except ValueError as e:
+            raise PresetError(f"broken JSON: {e}")
+        return validate_preset(preset)
+
+    def load(self, name):
+        return self._read(self.path(name))
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    def save(self, name, preset, overwrite=False):
+        path = self.path(name)
+        validate_preset(preset)
+        if not overwrite and os.path.exists(path):
+            raise FileExistsError(path)
+        atomic_write_json(path, preset)
+        return path
+
+    def _touch(self, name, path, preset):
+        index = self._load_index()
+        try:
+            index[name] = self._entry(os.stat(path), preset)
+        except OSError:
+            index.pop(name, None)
+
+    def delete(self, name):
+        os.remove(self.path(name))
+
+    def rename(self, old, new):
+        oldp, newp = self.path(old), self.path(new)
+        # A case-only rename (or old == new) sees the source itself on case-insensitive filesystems.
+        if os.path.normcase(oldp) != os.path.normcase(newp) and os.path.exists(newp):
+            raise FileExistsError(newp)
+        os.rename(oldp, newp)
+
+    def export_bundle(self, path, names=None):
+        presets = {}
+        if names is None:
+            for name in self.names():
+                try:
+                    presets[name] = self.load(name)
+                except (OSError, PresetError) as e:
+                    print(f"[WARN] skip {name}: {e}")
+        else:
+            presets = {name: self.load(name) for name in names}
+        atomic_write_json(path, {'presets': presets})
+        return list(presets)
+
+    def import_bundle(self, path, overwrite=False):
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                bundle = json.load(fh)
+        except ValueError as e:
+            raise PresetError(f"broken JSON: {e}")
+        presets = bundle.get('presets') if isinstance(bundle, dict) else None
+        if not isinstance(presets, dict):
+            raise PresetError("bundle must contain a 'presets' object")
+        for name, preset in presets.items():
+            check_name(name)
+            try:
+                validate_preset(preset)
+            except PresetError as e:
+                raise PresetError(f"{name}: {e}")
+        imported, skipped = [], []
+        try:
+            for name, preset in presets.items():
+                try:
+                    path = self.save(name, preset, overwrite=overwrite)
+                    # Entries are updated in memory; the index is written once below.
+                    self._touch(name, path, preset)
+                    imported.append(name)
+                except FileExistsError:
+                    skipped.append(name)
+        finally:
+            if imported:
+                self._save_index()
+        return imported, skipped
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Manage LOGO.IMG preview presets.")
+    ap.add_argument('--dir', default=os.path.dirname(os.path.abspath(__file__)), help="preset directory")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('list'); p.add_argument('--assets', help="asset folder to match")
+    sub.add_parser('check')
+    p = sub.add_parser('export'); p.add_argument('bundle'); p.add_argument('names', nargs='*')
+    p = sub.add_parser('import'); p.add_argument('bundle'); p.add_argument('--overwrite', action='store_true')
+    args = ap.parse_args(argv)
+    store = PresetStore(args.dir)
+    try:
+        if args.cmd == 'list':
+            ah = folder_hash(args.assets) if args.assets else None
+            for name in store.list(assets_hash=ah):
+                print(name)
+        elif args.cmd == 'check':
+            bad = 0
+            for name in store.names():
+                try:
+                    store.load(name)
+                except (OSError, PresetError) as e:
+                    print(f"[NG] {name}: {e}")
+                    bad += 1
+            return 1 if bad else 0
+        elif args.cmd == 'export':
+            names = store.export_bundle(args.bundle, args.names or None)
+            print(f"exported {len(names)} presets to {args.bundle}")
+        elif args.cmd == 'import':
+            imported, skipped = store.import_bundle(args.bundle, overwrite=args.overwrite)
+            print(f"imported {len(imported)} presets" + (f", skipped existing: {', '.join(skipped)}" if skipped else ""))
+    except (OSError, PresetError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
-import os, re, time, json
+import os, re, time
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 from PIL import Image, ImageTk
+from preset_store import PresetStore, PresetError, check_name, folder_hash
 
 BOOT_INDEX = 1
 CHG_FIRST_INDEX = 3
@@ -304,6 +305,8 @@ class App(tk.Tk):
         self.chg_start = None
         self.current_components = []
         self.preset_dir = script_dir()
+        self.preset_store = PresetStore(self.preset_dir)
+        self.assets_hash = None
         self._build_ui()
         self.after(0, self._wave_scheduler)
         self.refresh_preset_list()
@@ -386,6 +389,7 @@ class App(tk.Tk):
             messagebox.showerror("エラー", "画像が見つかりませんでした")
             return
         self.lk = LKEmulator(self.assets)
+        self.assets_hash = folder_hash(d)
         self.bx.set(self.lk.bat_x); self.by.set(self.lk.bat_y)
         self.bw.set(self.lk.bat_w); self.bh.set(self.lk.bat_h)
         self.fill16.set(self.lk.fill_v_at_16); self.fill99.set(self.lk.fill_v_at_99); self.fillbase.set(self.lk.fill_v_base)
@@ -537,16 +541,13 @@ class App(tk.Tk):
     def refresh_preset_list(self):
         dirp = self.presets_folder()
         self.preset_listbox.delete(0, 'end')
-        try:
-            files = sorted([f for f in os.listdir(dirp) if f.lower().endswith('.json')])
-        except:
-            files = []
-        for fn in files:
-            name = os.path.splitext(fn)[0]
+        if self.preset_store.folder != dirp:
+            self.preset_store = PresetStore(dirp)
+        for name in self.preset_store.list():
             self.preset_listbox.insert('end', name)
 
     def preset_path_from_name(self, name):
-        return os.path.join(self.presets_folder(), name + '.json')
+        return self.preset_store.path(name)
 
     def on_preset_select(self):
         pass
@@ -557,11 +558,9 @@ class App(tk.Tk):
             messagebox.showinfo("Info", "プリセットを選択してください")
             return
         name = self.preset_listbox.get(sel[0])
-        path = self.preset_path_from_name(name)
         try:
-            with open(path, 'r', encoding='utf-8') as fh:
-                preset = json.load(fh)
-        except Exception as e:
+            preset = self.preset_store.load(name)
+        except (OSError, PresetError) as e:
             messagebox.showerror("エラー", f"プリセット読み込み失敗: {e}")
             return
         self.apply_preset_to_ui(preset)
@@ -592,18 +591,17 @@ class App(tk.Tk):
         name = simpledialog.askstring("Save", "プリセット名 (拡張子 .json は不要):")
         if not name:
             return
-        name = name.strip()
-        if any(c in name for c in r'\/:*?"<>|'):
+        try:
+            name = check_name(name)
+        except PresetError:
             messagebox.showerror("エラー", "ファイル名に使えない文字が含まれています")
             return
-        path = self.preset_path_from_name(name)
-        if os.path.exists(path):
+        if self.preset_store.exists(name):
             messagebox.showwarning("存在する", "その名前のプリセットが既に存在します。別名を指定してください。既存プリセットを上書きする場合は Overwrite を使ってください。")
             return
-        preset = self.collect_current_preset()
         try:
-            with open(path, 'w', encoding='utf-8') as fh:
-                json.dump(preset, fh, ensure_ascii=False, indent=2)
+            preset = self.collect_current_preset()
+            path = self.preset_store.save(name, preset)
             self.refresh_preset_list()
             messagebox.showinfo("保存完了", f"プリセットを保存しました: {path}")
         except Exception as e:
@@ -615,11 +613,9 @@ class App(tk.Tk):
             messagebox.showinfo("Info", "プリセットを選択してください")
             return
         name = self.preset_listbox.get(sel[0])
-        path = self.preset_path_from_name(name)
-        preset = self.collect_current_preset()
         try:
-            with open(path, 'w', encoding='utf-8') as fh:
-                json.dump(preset, fh, ensure_ascii=False, indent=2)
+            preset = self.collect_current_preset()
+            self.preset_store.save(name, preset, overwrite=True)
             messagebox.showinfo("上書き完了", f"'{name}.json' を上書きしました")
             self.refresh_preset_list()
         except Exception as e:
@@ -633,9 +629,8 @@ class App(tk.Tk):
         name = self.preset_listbox.get(sel[0])
         if not messagebox.askyesno("確認", f"プリセット '{name}' を削除しますか?"):
             return
-        path = self.preset_path_from_name(name)
         try:
-            os.remove(path)
+            self.preset_store.delete(name)
             self.refresh_preset_list()
             messagebox.showinfo("削除完了", f"'{name}.json' を削除しました")
         except Exception as e:
@@ -650,20 +645,20 @@ class App(tk.Tk):
         new = simpledialog.askstring("Rename", "新しいプリセット名:", initialvalue=old)
         if not new:
             return
-        if any(c in new for c in r'\/:*?"<>|'):
+        try:
+            new = check_name(new)
+        except PresetError:
             messagebox.showerror("エラー", "ファイル名に使えない文字が含まれています")
             return
-        oldp = self.preset_path_from_name(old)
-        newp = self.preset_path_from_name(new)
         try:
-            os.rename(oldp, newp)
+            self.preset_store.rename(old, new)
             self.refresh_preset_list()
             messagebox.showinfo("完了", f"'{old}' を '{new}' に変更しました")
         except Exception as e:
             messagebox.showerror("エラー", f"リネーム失敗: {e}")
 
     def collect_current_preset(self):
-        return {
+        preset = {
             'bat_x': int(self.bx.get()),
             'bat_y': int(self.by.get()),
             'bat_w': int(self.bw.get()),
@@ -673,9 +668,12 @@ class App(tk.Tk):
             'fillbase': int(self.fillbase.get()),
             'pct_x': int(self.px_entry.get() or self.lk.pct_x),
             'pct_y': int(self.py_entry.get() or self.lk.pct_y),
-            'wave_fps': float(self.wave_fps_var.get()),
-            'low_fps': float(self.low_fps_var.get())
+            'wave_fps': max(0.1, float(self.wave_fps_var.get())),
+            'low_fps': max(1.0, float(self.low_fps_var.get()))
         }
+        if self.assets_hash:
+            preset['assets_hash'] = self.assets_hash
+        return preset
 
 if __name__ == '__main__':
     app = App()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+import sys, json, math, time, asyncio, argparse
+from io import BytesIO
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl, unquote
+from preset_store import PresetStore
+from preview import (LKEmulator, load_images, script_dir, MAIN_TICK_MS, LOW_THRESHOLD,
+                     LOW_BG_START, LOW_BG_END, WAVE_START, WAVE_END)
+
+DEFAULT_PORT = 8765
+FRAME_CACHE_SIZE = 64
+JPEG_QUALITY = 85
+CHG_INITIAL_SEC = 5
+MODES = ('boot', 'charging', 'recovery')
+BOUNDARY = 'lkframe'
+WAVE_FRAMES = WAVE_END - WAVE_START + 1
+LOW_FRAMES = LOW_BG_END - LOW_BG_START + 1
+
+PARAM_TYPES = {
+    'bat_x': int, 'bat_y': int, 'bat_w': int, 'bat_h': int,
+    'fill16': int, 'fill99': int, 'fillbase': int,
+    'pct_x': int, 'pct_y': int,
+    'wave_fps': float, 'low_fps': float,
+    'capacity': int, 'mode': str,
+}
+
+# Same limits as the sliders/spinboxes in preview.App.
+PARAM_RANGES = {
+    'bat_x': (0, 4000), 'bat_y': (0, 4000), 'bat_w': (10, 2000), 'bat_h': (1, 2000),
+    'fill16': (-300, 300), 'fill99': (-500, 500), 'fillbase': (-300, 300),
+    'wave_fps': (0.1, 60.0), 'low_fps': (1.0, 60.0), 'capacity': (0, 100),
+}
+
+INDEX_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>LOGO.IMG PREVIEW</title></head>
+<body style="background:#111;color:#ddd;font-family:sans-serif">
+<img src="/stream" style="max-width:100%;max-height:90vh">
+<p>GET /params?capacity=50&amp;mode=charging ... / POST /params (JSON) / GET /state / GET /presets</p>
+</body></html>
+"""
+
+class PreviewSession:
+    """Shares one LKEmulator, render loop and frame cache between all viewers."""
+
+    def __init__(self, assets, preset_dir):
+        self.lk = LKEmulator(assets)
+        self.presets = PresetStore(preset_dir)
+        self.mode = 'boot'
+        self.capacity = 50
+        self.chg_start = None
+        self.low_frame = 0
+        self.pending = {}
+        self.cache = OrderedDict()
+        self.frame = None
+        self.frame_key = None
+        self.frame_id = 0
+        self.viewers = 0
+        self.cond = asyncio.Condition()
+        self.render_lock = asyncio.Lock()
+        self.anim_start = time.monotonic()
+
+    def state(self):
+        lk = self.lk
+        return {
+            'bat_x': lk.bat_x, 'bat_y': lk.bat_y, 'bat_w': lk.bat_w, 'bat_h': lk.bat_h,
+            'fill16': lk.fill_v_at_16, 'fill99': lk.fill_v_at_99, 'fillbase': lk.fill_v_base,
+            'pct_x': lk.pct_x, 'pct_y': lk.pct_y,
+            'wave_fps': lk.wave_fps, 'low_fps': lk.low_fps,
+            'capacity': self.capacity, 'mode': self.mode,
+            'logical_w': lk.logical_w, 'logical_h': lk.logical_h,
+            'viewers': self.viewers,
+        }
+
+    def update(self, params):
+        # Values are checked here and applied right away unless a frame is
+        # rendering; then they wait for the next tick, never changing mid-render.
+        clean = {}
+        for k, v in params.items():
+            conv = PARAM_TYPES.get(k)
+            if conv is None:
+                continue
+            try:
+                v = conv(float(v)) if conv is int else conv(v)
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"invalid value for {k}: {v!r}")
+            if conv is float and not math.isfinite(v):
+                raise ValueError(f"invalid value for {k}: {v!r}")
+            if k == 'mode' and v not in MODES:
+                raise ValueError(f"unknown mode: {v!r}")
+            if k in PARAM_RANGES:
+                lo, hi = PARAM_RANGES[k]
+                v = max(lo, min(hi, v))
+            clean[k] = v
+        self.pending.update(clean)
+        if not self.render_lock.locked():
+            self._apply_pending()
+        return clean
+
+    def _apply_pending(self):
+        p, self.pending = self.pending, {}
+        lk = self.lk
+        if any(k in p for k in ('bat_x', 'bat_y', 'bat_w', 'bat_h')):
+            lk.set_battery_area(p.get('bat_x', lk.bat_x), p.get('bat_y', lk.bat_y),
+                                p.get('bat_w', lk.bat_w), p.get('bat_h', lk.bat_h))
+        if 'fill16' in p or 'fill99' in p:
+            lk.set_fill_v_points(p.get('fill16', lk.fill_v_at_16), p.get('fill99', lk.fill_v_at_99))
+        if 'fillbase' in p:
+            lk.fill_v_base = p['fillbase']
+        if 'pct_x' in p or 'pct_y' in p:
+            lk.set_percent_pos(p.get('pct_x', lk.pct_x), p.get('pct_y', lk.pct_y))
+        if 'wave_fps' in p:
+            lk.set_wave_fps(p['wave_fps'])
+        if 'low_fps' in p:
+            lk.set_low_fps(p['low_fps'])
+        if 'wave_fps' in p or 'low_fps' in p:
+            self.anim_start = time.monotonic()
+        if 'capacity' in p:
+            self.capacity = p['capacity']
+        if 'mode' in p:
+            if p['mode'] == 'charging' and self.mode != 'charging':
+                self.chg_start = self.anim_start = time.monotonic()
+            elif p['mode'] != 'charging':
+                self.chg_start = None
+            self.mode = p['mode']
+
+    def _anim_fps(self):
+        if self.mode != 'charging':
+            return None
+        return self.lk.wave_fps if self.capacity > LOW_THRESHOLD else self.lk.low_fps
+
+    def _advance(self, now):
+        # Frame index follows wall-clock time, so playback speed does not depend on the loop tick.
+        fps = self._anim_fps()
+        if fps is None:
+            return
+        n = int((now - self.anim_start) * fps)
+        if self.capacity > LOW_THRESHOLD:
+            self.lk.wave_frame = n % WAVE_FRAMES
+        else:
+            self.low_frame = n % LOW_FRAMES
+
+    def _next_deadline(self, now):
+        fps = self._anim_fps()
+        if fps is None:
+            return None
+        return self.anim_start + (int((now - self.anim_start) * fps) + 1) / fps
+
+    def _phase(self, now):
+        if self.mode != 'charging':
+            return self.mode
+        if self.chg_start is not None and now - self.chg_start < CHG_INITIAL_SEC:
+            return 'initial'
+        if self.capacity <= LOW_THRESHOLD:
+            return 'low'
+        return 'anim'
+
+    def _frame_key(self, phase):
+        lk = self.lk
+        geom = (lk.bat_x, lk.bat_y, lk.bat_w, lk.bat_h, lk.fill_v_at_16, lk.fill_v_at_99,
+                lk.fill_v_base, lk.pct_x, lk.pct_y)
+        if phase in ('boot', 'recovery', 'initial'):
+            return (phase,)
+        if phase == 'low':
+            return (phase, self.capacity, self.low_frame, geom)
+        return (phase, self.capacity, lk.wave_frame, geom)
+
+    def _render(self, phase):
+        lk = self.lk
+        if phase == 'boot':
+            out, _ = lk.draw_boot()
+        elif phase == 'recovery':
+            out, _ = lk.draw_recovery()
+        elif phase == 'initial':
+            out, _ = lk.draw_charging_initial()
+        elif phase == 'low':
+            out, _ = lk.draw_charging_animation(self.capacity, low_frame=self.low_frame)
+        else:
+            out, _ = lk.draw_charging_animation(self.capacity)
+        buf = BytesIO()
+        out.convert('RGB').save(buf, 'JPEG', quality=JPEG_QUALITY)
+        return buf.getvalue()
+
+    async def current_frame(self):
+        async with self.render_lock:
+            now = time.monotonic()
+            self._apply_pending()
+            self._advance(now)
+            phase = self._phase(now)
+            key = self._frame_key(phase)
+            data = self.cache.get(key)
+            if data is None:
+                loop = asyncio.get_running_loop()
+                data = await loop.run_in_executor(None, self._render, phase)
+                self.cache[key] = data
+                if len(self.cache) > FRAME_CACHE_SIZE:
+                    self.cache.popitem(last=False)
+            else:
+                self.cache.move_to_end(key)
+            if key != self.frame_key:
+                self.frame_key = key
+                self.frame = data
+                self.frame_id += 1
+            return self.frame
+
+    async def run(self):
+        while True:
+            if self.viewers:
+                last = self.frame_id
+                try:
+                    await self.current_frame()
+                except Exception as e:
+                    # One bad frame must not stop the loop every viewer shares.
+                    print(f"[WARN] render failed: {e}")
+                if self.frame_id != last:
+                    async with self.cond:
+                        self.cond.notify_all()
+            delay = MAIN_TICK_MS / 1000.0
+            now = time.monotonic()
+            deadline = self._next_deadline(now) if self.viewers else None
+            if deadline is not None:
+                delay = min(delay, max(0.001, deadline - now))
+            await asyncio.sleep(delay)
+
+    async def next_frame(self, last_id):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.frame_id != last_id and self.frame is not None)
+            return self.frame_id, self.frame
+
+async def _send(writer, status, body, ctype='application/json; charset=utf-8'):
+    if not isinstance(body, bytes):
+        if not isinstance(body, str):
+            body = json.dumps(body, ensure_ascii=False)
+        body = body.encode('utf-8')
+    head = (f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+            "Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+    writer.write(head.encode('ascii') + body)
+    await writer.drain()
+
+async def _stream(session, reader, writer):
+    writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary={BOUNDARY}\r\n"
+                  "Cache-Control: no-cache\r\nConnection: close\r\n\r\n").encode('ascii'))
+    session.viewers += 1
+    # A static picture never wakes next_frame, so watch the socket for EOF as well.
+    eof = asyncio.create_task(reader.read())
+    nxt = None
+    try:
+        fid, data = session.frame_id, session.frame
+        if data is None:
+            data = await session.current_frame()
+            fid = session.frame_id
+        while True:
+            writer.write((f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                          f"Content-Length: {len(data)}\r\n\r\n").encode('ascii') + data + b"\r\n")
+            await writer.drain()
+            nxt = asyncio.create_task(session.next_frame(fid))
+            await asyncio.wait((nxt, eof), return_when=asyncio.FIRST_COMPLETED)
+            if not nxt.done():
+                break
+            fid, data = nxt.result()
+    finally:
+        for t in (nxt, eof):
+            if t is not None:
+                t.cancel()
+        session.viewers -= 1
+
+async def handle_client(session, reader, writer):
+    try:
+        line = await reader.readline()
+        parts = line.decode('latin-1').split()
+        if len(parts) < 2:
+            return
+        method, target = parts[0].upper(), parts[1]
+        length = 0
+        while True:
+            h = await reader.readline()
+            if h in (b'\r\n', b'\n', b''):
+                break
+            k, _, v = h.decode('latin-1').partition(':')
+            if k.strip().lower() == 'content-length':
+                length = int(v.strip() or 0)
+        body = await reader.readexactly(length) if length else b''
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        query = dict(parse_qsl(url.query))
+
+        if path == '/':
+            await _send(writer, '200 OK', INDEX_HTML, 'text/html; charset=utf-8')
+        elif path == '/stream':
+            await _stream(session, reader, writer)
+        elif path == '/frame.jpg':
+            await _send(writer, '200 OK', await session.current_frame(), 'image/jpeg')
+        elif path == '/state':
+            await _send(writer, '200 OK', session.state())
+        elif path == '/params':
+            params = dict(query)
+            if method == 'POST' and body:
+                data = json.loads(body.decode('utf-8'))
+                if not isinstance(data, dict):
+                    raise ValueError("JSON body must be an object")
+                params.update(data)
+            await _send(writer, '200 OK', session.update(params))
+        elif path == '/presets':
+            # Preset I/O may hit a slow network mount; keep it off the render loop.
+            loop = asyncio.get_running_loop()
+            await _send(writer, '200 OK', await loop.run_in_executor(None, session.presets.list))
+        elif path.startswith('/presets/'):
+            name = unquote(path[len('/presets/'):])
+            loop = asyncio.get_running_loop()
+            preset = await loop.run_in_executor(None, session.presets.load, name)
+            if query.get('apply'):
+                session.update(preset)
+            await _send(writer, '200 OK', preset)
+        else:
+            await _send(writer, '404 Not Found', {'error': 'not found'})
+    except (ValueError, json.JSONDecodeError) as e:
+        await _send(writer, '400 Bad Request', {'error': str(e)})
+    except FileNotFoundError:
+        await _send(writer, '404 Not Found', {'error': 'preset not found'})
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(folder, host='127.0.0.1', port=DEFAULT_PORT, preset_dir=None):
+    assets = load_images(folder)
+    if not assets:
+        raise SystemExit(f"no images found in {folder}")
+    session = PreviewSession(assets, preset_dir or script_dir())
+    server = await asyncio.start_server(lambda r, w: handle_client(session, r, w), host, port)
+    print(f"[INFO] {len(assets)} images loaded, serving on http://{host}:{port}/")
+    loop_task = asyncio.create_task(session.run())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        loop_task.cancel()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream the LOGO.IMG preview to a browser (MJPEG).")
+    ap.add_argument('folder', help="project folder containing imgN.png")
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=DEFAULT_PORT)
+    ap.add_argument('--presets', default=None, help="preset directory (default: script directory)")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(serve(args.folder, args.host, args.port, args.presets))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main(sys.argv[1:])